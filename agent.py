@@ -2,20 +2,33 @@
 agent.py — Agentic orchestration loop for the Natural Language Data Analyst.
 
 Implements the Groq tool calling loop:
-1. Send user message + tool schemas to Groq
-2. Check if model returns tool_calls
-3. Execute each tool call locally
+1. Stream user message + tool schemas to Groq
+2. Start each tool call locally as soon as its arguments have streamed
+3. Run independent tool calls concurrently, stateful ones in order
 4. Append results to messages
-5. Loop until model returns a final text response (max 10 iterations)
+5. Loop until model returns a final text response (max 20 iterations,
+   stopping early when the same tool call keeps repeating)
 """
 
+import asyncio
+import functools
+import inspect
 import json
 import logging
 import os
-from groq import Groq
+import weakref
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import httpx
+from groq import APIConnectionError, APIError, AsyncGroq, DefaultAsyncHttpxClient, RateLimitError
 from dotenv import load_dotenv
 
-from tools import load_dataset, run_query, create_chart, export_results, clean_data
+from tools import (
+    load_dataset, run_query, create_chart, export_results, clean_data,
+    call_with_dataset, get_dataset, install_dataset, prepare_dataset,
+)
 from tool_schemas import TOOL_SCHEMAS
 
 load_dotenv()
@@ -29,8 +42,16 @@ logger = logging.getLogger(__name__)
 # Configuration
 # ---------------------------------------------------------------------------
 MODEL = "llama-3.3-70b-versatile"
-MAX_ITERATIONS = 10
+MAX_ITERATIONS = 20
+REPEAT_WINDOW = 3  # Recent tool calls checked for no-progress loops
 TEMPERATURE = 0.1  # Low temperature for precise analytical outputs
+MAX_RATE_LIMIT_RETRIES = 3  # On top of the SDK's own retries
+RETRY_BACKOFF_SECONDS = 1.0  # Doubled on each rate-limit retry
+LOG_RESULT_PREVIEW_CHARS = 512  # Tool result preview kept in tool_calls_log
+KEEP_RECENT_TOOL_TURNS = 2  # Tool turns whose results are sent to the model in full
+MAX_TOOL_CHARS = 2000  # Older tool results longer than this get truncated...
+TRUNCATED_TOOL_CHARS = 500  # ...down to this many characters
+MAX_HISTORY_MESSAGES = 64  # Messages kept after the system prompt; oldest turns go first
 
 SYSTEM_PROMPT = """You are an expert data analyst AI assistant. You help users explore, analyze, and visualize datasets through natural language conversation.
 
@@ -51,8 +72,11 @@ SYSTEM_PROMPT = """You are an expert data analyst AI assistant. You help users e
 - When grouping data, use meaningful aggregations (mean, sum, count as appropriate).
 """
 
+# Built once and shared by every conversation — never mutated
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
 # ---------------------------------------------------------------------------
-# Function registry — maps tool names to implementations
+# Function registry — maps tool names to implementations (sync or async)
 # ---------------------------------------------------------------------------
 AVAILABLE_FUNCTIONS = {
     "load_dataset": load_dataset,
@@ -62,13 +86,329 @@ AVAILABLE_FUNCTIONS = {
     "clean_data": clean_data,
 }
 
+def _accepted_args(fn) -> frozenset[str] | None:
+    """Keyword names a tool accepts, or None if it takes **kwargs."""
+    params = inspect.signature(fn).parameters.values()
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params):
+        return None
+    return frozenset(p.name for p in params)
+
+
+# Computed once so stray arguments from the model are dropped up front rather
+# than surfacing as a TypeError from the call
+_TOOL_ARG_NAMES = {name: _accepted_args(fn) for name, fn in AVAILABLE_FUNCTIONS.items()}
+
+
+# Tools that replace the in-memory dataset. They act as ordering barriers when
+# several tool calls arrive in one turn; everything else runs concurrently.
+STATEFUL_TOOLS = frozenset({"load_dataset", "clean_data"})
+
+# Sync tools dominated by pandas/matplotlib work. When several run at once on a
+# large dataset, the extras are sent to worker processes instead of sharing the
+# GIL in threads.
+CPU_BOUND_TOOLS = frozenset({"run_query", "create_chart"})
+# Each process call pickles the whole frame across, and the first one waits for
+# the pool to start (~1s). Below this many cells a typical query finishes in a
+# thread before that overhead pays off, so smaller datasets never use processes.
+PROCESS_MIN_CELLS = 1_000_000
+_process_pool: ProcessPoolExecutor | None = None
+
+# Tools whose result carries an artifact path, and the key it is stored under
+ARTIFACT_KEYS = {"create_chart": "chart_path", "export_results": "filepath"}
+
+
+# ---------------------------------------------------------------------------
+# Groq client
+# ---------------------------------------------------------------------------
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60)
+
+# One client per event loop: its connection pool is bound to the loop it was
+# created on. The Streamlit app runs every turn on one long-lived loop, so it
+# keeps reusing a single client; callers using asyncio.run per turn get one each
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq] = weakref.WeakKeyDictionary()
+
+
+def _get_client() -> AsyncGroq:
+    """Return the shared AsyncGroq client for the running event loop."""
+    if not GROQ_API_KEY:
+        raise RuntimeError("GROQ_API_KEY is not set. Add it to your .env file (see .env.example).")
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # HTTP/2 lets concurrent sessions on this loop multiplex over one connection
+        http_client = DefaultAsyncHttpxClient(http2=True, limits=HTTP_LIMITS)
+        client = _clients[loop] = AsyncGroq(api_key=GROQ_API_KEY, http_client=http_client)
+    return client
+
+
+# ---------------------------------------------------------------------------
+# Error helpers
+# ---------------------------------------------------------------------------
+def _error_code(err: APIError) -> str | None:
+    """Return Groq's error code, e.g. "tool_use_failed", from an API error body."""
+    body = err.body if isinstance(err.body, dict) else {}
+    # HTTP errors carry {"error": {...}}; errors raised mid-stream carry the inner dict
+    error = body.get("error", body)
+    return error.get("code") if isinstance(error, dict) else None
+
+
+# ---------------------------------------------------------------------------
+# History compaction
+# ---------------------------------------------------------------------------
+def _compact_messages(
+    messages: list,
+    keep_recent_tool_turns: int = KEEP_RECENT_TOOL_TURNS,
+    max_tool_chars: int = MAX_TOOL_CHARS,
+) -> None:
+    """
+    Shrink old tool outputs in place so the prompt stops growing every turn.
+
+    Tool results from before the last `keep_recent_tool_turns` tool-calling
+    assistant turns are cut to a short preview when longer than
+    `max_tool_chars`, and repeated identical load_dataset results keep only
+    the newest copy. Tool messages are never removed, since every tool_call_id
+    needs an answer.
+    """
+    turn_starts = [i for i, msg in enumerate(messages) if msg.get("role") == "assistant" and msg.get("tool_calls")]
+    cutoff = turn_starts[-keep_recent_tool_turns] if len(turn_starts) > keep_recent_tool_turns else 0
+
+    seen_loads = set()
+    for i in range(len(messages) - 1, 0, -1):
+        msg = messages[i]
+        if msg.get("role") != "tool":
+            continue
+        content = msg["content"]
+
+        if msg.get("name") == "load_dataset":
+            if content in seen_loads:
+                messages[i] = {**msg, "content": "[Same result as a later load_dataset call.]"}
+                continue
+            seen_loads.add(content)
+
+        if i < cutoff and len(content) > max_tool_chars:
+            omitted = len(content) - TRUNCATED_TOOL_CHARS
+            messages[i] = {**msg, "content": f"{content[:TRUNCATED_TOOL_CHARS]}... [truncated, {omitted} chars omitted]"}
+
+
+def _trim_history(messages: list, max_messages: int = MAX_HISTORY_MESSAGES) -> None:
+    """
+    Drop the oldest conversation turns in place once the history after the
+    system prompt exceeds `max_messages`.
+
+    Cuts only land on user messages, so tool results are never separated from
+    the assistant message that called them, and the current turn is always kept.
+    """
+    excess = len(messages) - 1 - max_messages
+    if excess <= 0:
+        return
+    for i in range(1 + excess, len(messages)):
+        if messages[i].get("role") == "user":
+            del messages[1:i]
+            return
+
+
+# ---------------------------------------------------------------------------
+# Tool dispatch
+# ---------------------------------------------------------------------------
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared worker-process pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next process call starts a fresh one."""
+    global _process_pool
+    if _process_pool is pool:
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _call_tool(function_name: str, function_args: dict, in_process: bool = False) -> str:
+    """
+    Invoke a registered tool, running sync tools in a worker thread — or, with
+    `in_process`, in a worker process that receives a copy of the dataset.
+    """
+    function_to_call = AVAILABLE_FUNCTIONS.get(function_name)
+    if function_to_call is None:
+        return json.dumps({"error": f"Unknown tool: {function_name}"})
+
+    accepted = _TOOL_ARG_NAMES.get(function_name)
+    if accepted is not None:
+        function_args = {k: v for k, v in function_args.items() if k in accepted}
+
+    if inspect.iscoroutinefunction(function_to_call):
+        return await function_to_call(**function_args)
+    if in_process:
+        call = functools.partial(call_with_dataset, function_to_call, get_dataset(), function_args)
+        pool = _get_process_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, call)
+        except BrokenProcessPool:
+            # A worker died (OOM, crash in generated code); run this call in a thread instead
+            _discard_process_pool(pool)
+            logger.warning("Worker process pool broke; retrying '%s' in a thread", function_name)
+    return await asyncio.to_thread(function_to_call, **function_args)
+
+
+class _ToolScheduler:
+    """
+    Start tool calls as soon as they are known, while the model is still streaming.
+
+    Read-only calls run concurrently with each other; a stateful call waits for
+    everything submitted before it, and later calls wait for it in turn.
+
+    An optional `preload` (path, task) parses the dataset before the turn without
+    installing it. A matching load_dataset call installs that result instead of
+    parsing the file again; if the model never asks for it, nothing changes.
+    """
+
+    def __init__(self, preload: tuple[str, asyncio.Task] | None = None):
+        self.calls: list[tuple[dict, str, dict]] = []
+        self._tasks: list[asyncio.Task] = []
+        self._pending: list[asyncio.Task] = []
+        self._barrier: asyncio.Task | None = None
+        self._preload = preload
+        self._cpu_active = 0
+
+    def submit(self, tool_call: dict) -> None:
+        """Parse a fully streamed tool call and schedule its execution."""
+        function = tool_call["function"]
+        function_name = function["name"]
+        try:
+            function_args = json.loads(function["arguments"] or "{}")
+        except json.JSONDecodeError:
+            function_args = {}
+
+        # function_args can be a large dict, so skip its repr when INFO is off
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Calling tool '%s' with args: %s", function_name, function_args)
+
+        waits = [self._barrier] if self._barrier else []
+        if function_name in STATEFUL_TOOLS:
+            if self._claims_preload(function_name, function_args):
+                run = self._install_preload(waits + self._pending, self._preload[1])
+                self._preload = None
+            else:
+                run = self._run(waits + self._pending, function_name, function_args)
+            task = asyncio.create_task(run)
+            self._barrier = task
+            self._pending = []
+        else:
+            task = asyncio.create_task(self._run(waits, function_name, function_args))
+            self._pending.append(task)
+
+        self.calls.append((tool_call, function_name, function_args))
+        self._tasks.append(task)
+
+    def _claims_preload(self, function_name: str, function_args: dict) -> bool:
+        return (
+            self._preload is not None
+            and function_name == "load_dataset"
+            and os.path.abspath(str(function_args.get("filename", ""))) == os.path.abspath(self._preload[0])
+        )
+
+    async def _install_preload(self, waits: list[asyncio.Task], preload: asyncio.Task) -> str:
+        # Installs in the same slot a real load_dataset would have run in
+        await asyncio.gather(*waits, return_exceptions=True)
+        return install_dataset(*await preload)
+
+    async def _run(self, waits: list[asyncio.Task], function_name: str, function_args: dict) -> str:
+        await asyncio.gather(*waits, return_exceptions=True)
+        if function_name not in CPU_BOUND_TOOLS:
+            return await _call_tool(function_name, function_args)
+
+        # The first CPU-bound call runs in a thread as usual; calls overlapping it
+        # go to worker processes so they don't contend for the GIL, if the
+        # dataset is big enough to be worth shipping there
+        df = get_dataset()
+        in_process = self._cpu_active > 0 and df is not None and df.size >= PROCESS_MIN_CELLS
+        self._cpu_active += 1
+        try:
+            return await _call_tool(function_name, function_args, in_process=in_process)
+        finally:
+            self._cpu_active -= 1
+
+    async def results(self) -> list:
+        """Wait for every submitted call; exceptions are returned in place of results."""
+        return await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _stream_turn(
+    client: AsyncGroq, messages: list, scheduler: _ToolScheduler, tool_choice: str = "auto"
+) -> AsyncIterator[str]:
+    """
+    Stream one model turn, yielding text deltas as they arrive and handing each
+    tool call to the scheduler as soon as its arguments have fully streamed.
+
+    The assembled tool calls (API dict format) end up in `scheduler.calls`.
+    """
+    stream = await client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        tool_choice=tool_choice,
+        temperature=TEMPERATURE,
+        max_tokens=4096,
+        stream=True,
+        # The schemas are static, plain JSON — sending them via extra_body skips
+        # the SDK re-walking them through its param transform on every call
+        extra_body={"tools": TOOL_SCHEMAS},
+    )
+
+    tool_calls: dict[int, dict] = {}
+    submitted = 0
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            yield delta.content
+
+        for tc_delta in delta.tool_calls or []:
+            # Tool calls stream in index order, so a new index means every
+            # earlier call is complete and can start running
+            while submitted < tc_delta.index:
+                if submitted in tool_calls:
+                    scheduler.submit(tool_calls[submitted])
+                submitted += 1
+
+            buf = tool_calls.setdefault(tc_delta.index, {
+                "id": "",
+                "type": "function",
+                "function": {"name": "", "arguments": ""},
+            })
+            if tc_delta.id:
+                buf["id"] = tc_delta.id
+            if tc_delta.function:
+                buf["function"]["name"] += tc_delta.function.name or ""
+                buf["function"]["arguments"] += tc_delta.function.arguments or ""
+
+    for index in sorted(tool_calls):
+        if index >= submitted:
+            scheduler.submit(tool_calls[index])
+
 
 # ---------------------------------------------------------------------------
 # Core agent loop
 # ---------------------------------------------------------------------------
-def run_agent(user_message: str, messages: list | None = None, dataset_path: str | None = None) -> dict:
+async def run_agent_stream(
+    user_message: str, messages: list | None = None, dataset_path: str | None = None
+) -> AsyncIterator[str | dict]:
     """
-    Run the agentic tool calling loop.
+    Run the agentic tool calling loop, streaming the response text.
+
+    Yields text deltas (str) as the model produces them, then a single final
+    dict — the same result `run_agent` returns. Usage:
+
+        async for item in run_agent_stream(question):
+            if isinstance(item, dict):
+                result = item
+            else:
+                print(item, end="")
 
     Args:
         user_message: The user's natural language question.
@@ -76,19 +416,19 @@ def run_agent(user_message: str, messages: list | None = None, dataset_path: str
                   If None, starts a fresh conversation.
         dataset_path: Optional path to auto-load a dataset.
 
-    Returns:
-        dict with keys:
+    Yields:
+        Text deltas, followed by a dict with keys:
             - "response": The final assistant text response
             - "messages": Updated conversation history
             - "charts": List of chart file paths generated
             - "exports": List of exported file paths
             - "tool_calls_log": List of tool calls made (for UI display)
     """
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    client = _get_client()
 
     # Initialize conversation
     if messages is None:
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        messages = [_SYSTEM_MESSAGE]
 
     # If a dataset path is provided and it's the first load, inject context
     if dataset_path:
@@ -102,76 +442,112 @@ def run_agent(user_message: str, messages: list | None = None, dataset_path: str
     # Track artifacts generated
     charts = []
     exports = []
+    artifacts = {"chart_path": charts, "filepath": exports}
     tool_calls_log = []
 
+    # Speculatively parse the dataset while the first completion streams — the
+    # model almost always asks for it first, and can then reuse the result.
+    # Nothing is installed unless it does, so earlier clean_data edits survive.
+    preload = None
+    if dataset_path:
+        preload = (dataset_path, asyncio.create_task(asyncio.to_thread(prepare_dataset, dataset_path)))
+
     # ---------------------------------------------------------------------------
     # Agentic loop
     # ---------------------------------------------------------------------------
     iteration = 0
+    rate_limit_retries = 0
+    force_text = False
+    recent_calls = deque(maxlen=REPEAT_WINDOW)
+    connection_retried = False
     while iteration < MAX_ITERATIONS:
         iteration += 1
         logger.debug("Agent loop iteration %d/%d", iteration, MAX_ITERATIONS)
+        _trim_history(messages)
 
-        # Call Groq with tool schemas
+        # Call Groq with tool schemas; tool calls start executing mid-stream
+        scheduler = _ToolScheduler(preload)
+        preload = None  # Only the first turn can claim it
+        content_parts = []
         try:
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=messages,
-                tools=TOOL_SCHEMAS,
-                tool_choice="auto",
-                temperature=TEMPERATURE,
-                max_tokens=4096,
-            )
-        except Exception as api_err:
-            err_str = str(api_err)
+            # After a malformed tool call, only a text answer is allowed
+            tool_choice = "none" if force_text else "auto"
+            async for text in _stream_turn(client, messages, scheduler, tool_choice):
+                content_parts.append(text)
+                yield text
+        except APIError as api_err:
+            # Let any tools that already started settle before moving on
+            await scheduler.results()
+
+            if isinstance(api_err, RateLimitError) and rate_limit_retries < MAX_RATE_LIMIT_RETRIES:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** rate_limit_retries
+                rate_limit_retries += 1
+                logger.warning("Groq rate limit hit, retrying in %.1fs (iteration %d)", delay, iteration)
+                await asyncio.sleep(delay)
+                continue
+
+            if isinstance(api_err, APIConnectionError) and not connection_retried:
+                connection_retried = True
+                logger.warning("Groq connection error, retrying once (iteration %d)", iteration)
+                continue
+
             # Groq returns tool_use_failed when the LLM generates malformed tool JSON
-            if "tool_use_failed" in err_str:
-                logger.warning("Malformed tool call from LLM, asking for retry (iteration %d)", iteration)
+            # Rather than retrying with tools, force a text-only answer next, once
+            if _error_code(api_err) == "tool_use_failed" and not force_text:
+                force_text = True
+                logger.warning("Malformed tool call from LLM, falling back to a text answer (iteration %d)", iteration)
                 messages.append({
                     "role": "user",
-                    "content": "[System: Your previous tool call was malformed. Please try again with valid arguments, or respond directly without using tools.]",
+                    "content": "[System: Your previous tool call was malformed. Respond directly without using tools.]",
                 })
                 continue
+
             # Other API errors — return gracefully
-            logger.error("Groq API error: %s", err_str)
-            return {
-                "response": f"API error: {err_str}",
+            logger.error("Groq API error: %s", api_err)
+            yield {
+                "response": f"API error: {api_err}",
                 "messages": messages,
                 "charts": charts,
                 "exports": exports,
                 "tool_calls_log": tool_calls_log,
             }
+            return
 
-        response_message = response.choices[0].message
-        tool_calls = response_message.tool_calls
+        content = "".join(content_parts)
 
         # If no tool calls, we have our final response
-        if not tool_calls:
+        if not scheduler.calls:
             # Append the final assistant message
             messages.append({
                 "role": "assistant",
-                "content": response_message.content or ""
+                "content": content
             })
-            return {
-                "response": response_message.content or "",
+            yield {
+                "response": content,
                 "messages": messages,
                 "charts": charts,
                 "exports": exports,
                 "tool_calls_log": tool_calls_log,
             }
+            return
 
         # Append assistant message with tool calls
-        messages.append(response_message)
+        assistant_message = {"role": "assistant", "tool_calls": [tool_call for tool_call, _, _ in scheduler.calls]}
+        if content:
+            assistant_message["content"] = content
+        messages.append(assistant_message)
 
-        # Execute each tool call
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            try:
-                function_args = json.loads(tool_call.function.arguments)
-            except json.JSONDecodeError:
-                function_args = {}
+        # Wait for the tool calls dispatched during streaming
+        results = await scheduler.results()
 
-            logger.info("Calling tool '%s' with args: %s", function_name, function_args)
+        # Results come back in call order, preserving tool_call_id ordering
+        repeated = False
+        for (tool_call, function_name, function_args), result in zip(scheduler.calls, results):
+            # The same call already seen twice recently means no progress is being made
+            call_key = (function_name, json.dumps(function_args, sort_keys=True, default=str))
+            if recent_calls.count(call_key) >= 2:
+                repeated = True
+            recent_calls.append(call_key)
 
             # Log the tool call
             log_entry = {
@@ -180,48 +556,77 @@ def run_agent(user_message: str, messages: list | None = None, dataset_path: str
                 "iteration": iteration,
             }
 
-            # Execute the function
-            if function_name in AVAILABLE_FUNCTIONS:
-                function_to_call = AVAILABLE_FUNCTIONS[function_name]
-                try:
-                    function_response = function_to_call(**function_args)
-                except TypeError as e:
-                    function_response = json.dumps({"error": f"Invalid arguments: {str(e)}"})
-                except Exception as e:
-                    logger.exception("Tool '%s' raised an exception", function_name)
-                    function_response = json.dumps({"error": f"Tool execution error: {str(e)}"})
+            if isinstance(result, TypeError):
+                function_response = json.dumps({"error": f"Invalid arguments: {str(result)}"})
+            elif isinstance(result, Exception):
+                logger.error("Tool '%s' raised an exception", function_name, exc_info=result)
+                function_response = json.dumps({"error": f"Tool execution error: {str(result)}"})
             else:
-                function_response = json.dumps({"error": f"Unknown tool: {function_name}"})
+                function_response = result
 
-            log_entry["result"] = function_response
+            log_entry["result"] = function_response[:LOG_RESULT_PREVIEW_CHARS]
             tool_calls_log.append(log_entry)
 
-            # Track generated artifacts
-            try:
-                result_data = json.loads(function_response)
-                if "chart_path" in result_data:
-                    charts.append(result_data["chart_path"])
-                if "filepath" in result_data:
-                    exports.append(result_data["filepath"])
-            except (json.JSONDecodeError, TypeError):
-                pass
+            # Track generated artifacts — only artifact tools are parsed, so large
+            # run_query / load_dataset payloads never go through json.loads here
+            artifact_key = ARTIFACT_KEYS.get(function_name)
+            if artifact_key:
+                try:
+                    artifact_path = json.loads(function_response).get(artifact_key)
+                except (json.JSONDecodeError, AttributeError):
+                    artifact_path = None
+                if artifact_path:
+                    artifacts[artifact_key].append(artifact_path)
 
             # Append tool result to messages
             messages.append({
-                "tool_call_id": tool_call.id,
+                "tool_call_id": tool_call["id"],
                 "role": "tool",
                 "name": function_name,
                 "content": function_response,
             })
 
+        if repeated:
+            logger.warning("Detected repeated tool call — stopping early (iteration %d)", iteration)
+            final_msg = "I stopped because the same tool call kept repeating without progress. Here's what I found so far."
+            messages.append({"role": "assistant", "content": final_msg})
+            yield {
+                "response": final_msg,
+                "messages": messages,
+                "charts": charts,
+                "exports": exports,
+                "tool_calls_log": tool_calls_log,
+            }
+            return
+
+        # Keep the history sent on the next iteration from growing without bound
+        _compact_messages(messages)
+
     # If we hit max iterations, return what we have
     logger.warning("Agent hit MAX_ITERATIONS (%d) — returning partial results", MAX_ITERATIONS)
     final_msg = "I've reached the maximum number of analysis steps. Here's what I found so far."
     messages.append({"role": "assistant", "content": final_msg})
-    return {
+    yield {
         "response": final_msg,
         "messages": messages,
         "charts": charts,
         "exports": exports,
         "tool_calls_log": tool_calls_log,
     }
+
+
+async def run_agent(user_message: str, messages: list | None = None, dataset_path: str | None = None) -> dict:
+    """
+    Run the agentic tool calling loop and return the final result.
+
+    This is a coroutine — synchronous callers should wrap it in
+    `asyncio.run(run_agent(...))`. Use `run_agent_stream` to receive the
+    response text as it is generated.
+
+    Returns:
+        The final dict yielded by `run_agent_stream` ("response", "messages",
+        "charts", "exports", "tool_calls_log").
+    """
+    async for item in run_agent_stream(user_message, messages, dataset_path):
+        if isinstance(item, dict):
+            return item
@@ -0,0 +1,56 @@
+"""
+Tests for tools.py. Run from the project root with: python -m unittest discover tests
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import tools
+
+
+class RunQueryPreviewTest(unittest.TestCase):
+    def setUp(self):
+        tools.set_dataset(pd.DataFrame({"Units": [60, 90, 44, 10], "Discount": [0.18, 0.08, 0.0, 0.075]}))
+
+    def tearDown(self):
+        tools.clear_dataset()
+
+    def _preview(self, code: str) -> str:
+        out = json.loads(tools.run_query(code))
+        self.assertEqual(out["status"], "success", out)
+        return out["result"]
+
+    def test_unnamed_series_has_no_header_line(self):
+        text = self._preview("result = (df['Units'] * df['Discount']).head(4)")
+        self.assertEqual(text.splitlines(), ["10.8", "7.2", "0", "0.75"])
+
+    def test_float_noise_is_trimmed(self):
+        # 0.075 * 3 is 0.22499999999999998 in binary floating point
+        text = self._preview("result = df['Discount'] * 3")
+        self.assertEqual(text.splitlines(), ["Discount", "0.54", "0.24", "0", "0.225"])
+
+
+
+class WriteFrameCsvTest(unittest.TestCase):
+    def _round_trip(self, df: pd.DataFrame) -> pd.DataFrame:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.csv")
+            tools._write_frame_csv(df, path)
+            return pd.read_csv(path)
+
+    def test_whole_valued_floats_stay_float(self):
+        back = self._round_trip(pd.DataFrame({"Revenue": [100.0, 250.0, 0.0]}))
+        self.assertEqual(back["Revenue"].dtype, "float64")
+        self.assertEqual(back["Revenue"].tolist(), [100.0, 250.0, 0.0])
+
+    def test_ints_and_strings_round_trip(self):
+        df = pd.DataFrame({"Units": [60, 90], "Region": ["North", "South, East"]})
+        pd.testing.assert_frame_equal(self._round_trip(df), df)
+
+
+if __name__ == "__main__":
+    unittest.main()
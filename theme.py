@@ -0,0 +1,263 @@
+"""
+theme.py — Static CSS, SVG icons and HTML fragments for the Streamlit UI.
+
+Streamlit re-executes app.py on every rerun, but imported modules are only
+loaded once per process, so everything here is built a single time.
+"""
+
+import re
+
+# ---------------------------------------------------------------------------
+# SVG icons (Lucide — no emojis as UI icons). Shared stroke attributes live
+# in the .dm-icon CSS rule instead of being repeated on every icon.
+# ---------------------------------------------------------------------------
+ICONS = {
+    "upload":   '<svg class="dm-icon" width="18" height="18" viewBox="0 0 24 24"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="17 8 12 3 7 8"/><line x1="12" y1="3" x2="12" y2="15"/></svg>',
+    "database": '<svg class="dm-icon" width="18" height="18" viewBox="0 0 24 24"><ellipse cx="12" cy="5" rx="9" ry="3"/><path d="M21 12c0 1.66-4 3-9 3s-9-1.34-9-3"/><path d="M3 5v14c0 1.66 4 3 9 3s9-1.34 9-3V5"/></svg>',
+    "search":   '<svg class="dm-icon" width="20" height="20" viewBox="0 0 24 24"><circle cx="11" cy="11" r="8"/><path d="m21 21-4.3-4.3"/></svg>',
+    "chart":    '<svg class="dm-icon" width="20" height="20" viewBox="0 0 24 24"><line x1="18" y1="20" x2="18" y2="10"/><line x1="12" y1="20" x2="12" y2="4"/><line x1="6" y1="20" x2="6" y2="14"/></svg>',
+    "calc":     '<svg class="dm-icon" width="20" height="20" viewBox="0 0 24 24"><rect width="16" height="20" x="4" y="2" rx="2"/><line x1="8" x2="16" y1="6" y2="6"/><line x1="16" x2="16" y1="14" y2="18"/><path d="M16 10h.01"/><path d="M12 10h.01"/><path d="M8 10h.01"/><path d="M12 14h.01"/><path d="M8 14h.01"/><path d="M12 18h.01"/><path d="M8 18h.01"/></svg>',
+    "download": '<svg class="dm-icon" width="20" height="20" viewBox="0 0 24 24"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/></svg>',
+    "bolt":     '<svg class="dm-icon" width="14" height="14" viewBox="0 0 24 24"><polygon points="13 2 3 14 12 14 11 22 21 10 12 10 13 2"/></svg>',
+    "message":  '<svg class="dm-icon" width="16" height="16" viewBox="0 0 24 24"><path d="M21 15a2 2 0 0 1-2 2H7l-4 4V5a2 2 0 0 1 2-2h14a2 2 0 0 1 2 2z"/></svg>',
+    "check":    '<svg class="dm-icon dm-icon-bold" width="14" height="14" viewBox="0 0 24 24"><polyline points="20 6 9 17 4 12"/></svg>',
+    "folder":   '<svg class="dm-icon" width="16" height="16" viewBox="0 0 24 24"><path d="M22 19a2 2 0 0 1-2 2H4a2 2 0 0 1-2-2V5a2 2 0 0 1 2-2h5l2 3h9a2 2 0 0 1 2 2z"/></svg>',
+    "sparkles": '<svg class="dm-icon" width="18" height="18" viewBox="0 0 24 24"><path d="m12 3-1.912 5.813a2 2 0 0 1-1.275 1.275L3 12l5.813 1.912a2 2 0 0 1 1.275 1.275L12 21l1.912-5.813a2 2 0 0 1 1.275-1.275L21 12l-5.813-1.912a2 2 0 0 1-1.275-1.275L12 3Z"/><path d="M5 3v4"/><path d="M19 17v4"/><path d="M3 5h4"/><path d="M17 19h4"/></svg>',
+}
+
+# ---------------------------------------------------------------------------
+# Fonts — linked rather than @import-ed so they don't block the stylesheet.
+# Only the weights the CSS below actually uses are requested.
+# ---------------------------------------------------------------------------
+FONT_LINKS_HTML = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?'
+    'family=Fira+Code:wght@400;500;600;700&family=Fira+Sans:wght@400;600&display=swap">'
+)
+
+# ---------------------------------------------------------------------------
+# CSS — OLED Dark Design System
+# ---------------------------------------------------------------------------
+_CSS_SOURCE = """
+    .dm-icon { fill: none; stroke: currentColor; stroke-width: 2; stroke-linecap: round; stroke-linejoin: round; }
+    .dm-icon-bold { stroke-width: 2.5; }
+
+    :root {
+        --bg-deep: #050910; --bg-primary: #070B14; --bg-secondary: #0C1220;
+        --bg-card: #0F1629; --bg-card-hover: #141D35;
+        --border: rgba(30,64,175,0.20); --border-hover: rgba(59,130,246,0.35);
+        --primary: #1E40AF; --secondary: #3B82F6; --accent: #60A5FA;
+        --cta: #F59E0B; --success: #10B981; --error: #EF4444;
+        --text: #E2E8F0; --text-muted: #94A3B8; --text-dim: #64748B;
+        --glow-blue: 0 0 20px rgba(59,130,246,0.15);
+    }
+
+    .stApp {
+        background: var(--bg-deep) !important;
+        font-family: 'Fira Sans', system-ui, sans-serif !important;
+        color: var(--text) !important;
+    }
+    .main .block-container { padding-top: 1.5rem !important; max-width: 1100px; }
+
+    /* Sidebar */
+    section[data-testid="stSidebar"] {
+        background: var(--bg-primary) !important;
+        border-right: 1px solid var(--border) !important;
+    }
+    section[data-testid="stSidebar"] :is(p, span, label, button, input, .stMarkdown :is(p, li, h1, h2, h3)) {
+        font-family: 'Fira Sans', sans-serif !important;
+        color: var(--text) !important;
+    }
+
+    /* Header */
+    .dm-header { text-align: center; padding: 1.5rem 0 0.75rem; margin-bottom: 1.5rem; }
+    .dm-title {
+        font-family: 'Fira Code', monospace; font-size: 2.4rem; font-weight: 700;
+        color: #fff; text-shadow: 0 0 40px rgba(16,185,129,0.3); letter-spacing: -1px; margin-bottom: 0.4rem;
+    }
+    .dm-title-accent { color: var(--success); }
+    .dm-subtitle { font-family: 'Fira Sans', sans-serif; font-size: 0.9rem; color: var(--text-muted); letter-spacing: 0.5px; }
+    .dm-subtitle code {
+        font-family: 'Fira Code', monospace; font-size: 0.8rem; color: var(--accent);
+        background: rgba(59,130,246,0.1); padding: 2px 8px; border-radius: 4px; border: 1px solid rgba(59,130,246,0.2);
+    }
+
+    /* Feature Cards */
+    .dm-features { display: grid; grid-template-columns: repeat(4,1fr); gap: 0.75rem; margin-bottom: 2rem; }
+    .dm-feature-card {
+        background: var(--bg-card); border: 1px solid var(--border); border-radius: 12px;
+        padding: 1.25rem 1rem; text-align: center; transition: all 200ms ease;
+    }
+    .dm-feature-card:hover {
+        border-color: var(--border-hover); background: var(--bg-card-hover);
+        box-shadow: var(--glow-blue); transform: translateY(-2px);
+    }
+    .dm-feature-icon {
+        display: inline-flex; align-items: center; justify-content: center;
+        width: 40px; height: 40px; border-radius: 10px; margin-bottom: 0.6rem;
+    }
+    .dm-feature-icon.blue  { background: rgba(59,130,246,0.12); color: var(--secondary); }
+    .dm-feature-icon.amber { background: rgba(245,158,11,0.12); color: var(--cta); }
+    .dm-feature-icon.green { background: rgba(16,185,129,0.12); color: var(--success); }
+    .dm-feature-icon.cyan  { background: rgba(96,165,250,0.12); color: var(--accent); }
+    .dm-feature-title { font-family: 'Fira Code', monospace; font-size: 0.85rem; font-weight: 600; color: var(--text); margin-bottom: 0.2rem; }
+    .dm-feature-desc { font-size: 0.78rem; color: var(--text-dim); line-height: 1.4; }
+
+    /* Chat Messages */
+    .dm-user-msg {
+        background: linear-gradient(135deg, var(--primary), #2563EB); color: #fff;
+        padding: 0.9rem 1.15rem; border-radius: 16px 16px 4px 16px;
+        margin: 0.6rem 0; max-width: 80%; margin-left: auto;
+        font-size: 0.92rem; line-height: 1.55; box-shadow: 0 4px 20px rgba(30,64,175,0.35);
+    }
+    .dm-assistant-msg {
+        background: var(--bg-card); color: var(--text);
+        padding: 1.1rem 1.3rem; border-radius: 16px 16px 16px 4px;
+        margin: 0.6rem 0; border: 1px solid var(--border);
+        font-size: 0.92rem; line-height: 1.65; white-space: pre-wrap;
+    }
+    .dm-assistant-msg code {
+        font-family: 'Fira Code', monospace; font-size: 0.82rem;
+        background: rgba(59,130,246,0.08); padding: 1px 6px; border-radius: 4px; color: var(--accent);
+    }
+    .dm-error-msg { border-color: rgba(239,68,68,0.3) !important; }
+
+    /* Tool Badge */
+    .dm-tool-badge {
+        display: inline-flex; align-items: center; gap: 5px;
+        background: rgba(16,185,129,0.10); border: 1px solid rgba(16,185,129,0.25); color: var(--success);
+        padding: 3px 10px; border-radius: 6px;
+        font-family: 'Fira Code', monospace; font-size: 0.72rem; font-weight: 500; margin: 2px 4px 2px 0;
+    }
+
+    /* Status Badges */
+    .dm-status-loaded {
+        display: inline-flex; align-items: center; gap: 6px;
+        background: rgba(16,185,129,0.10); color: var(--success);
+        padding: 5px 12px; border-radius: 6px;
+        font-family: 'Fira Code', monospace; font-size: 0.78rem; font-weight: 500;
+        border: 1px solid rgba(16,185,129,0.25);
+    }
+    .dm-status-empty {
+        display: inline-flex; align-items: center; gap: 6px;
+        background: rgba(100,116,139,0.10); color: var(--text-dim);
+        padding: 5px 12px; border-radius: 6px;
+        font-family: 'Fira Code', monospace; font-size: 0.78rem; font-weight: 500;
+        border: 1px solid rgba(100,116,139,0.15);
+    }
+
+    /* Sample Query Pills */
+    .dm-query-pill {
+        display: flex; align-items: center; gap: 8px; width: 100%;
+        padding: 0.5rem 0.75rem; background: rgba(30,64,175,0.06);
+        border: 1px solid rgba(30,64,175,0.15); border-radius: 8px;
+        color: var(--text-muted); font-size: 0.8rem; margin-bottom: 0.35rem; transition: all 200ms ease;
+    }
+    .dm-query-pill:hover { background: rgba(59,130,246,0.10); border-color: var(--secondary); color: var(--text); }
+
+    /* Misc */
+    .dm-divider { border: none; border-top: 1px solid var(--border); margin: 1rem 0; }
+    .dm-section-label {
+        font-family: 'Fira Code', monospace; font-size: 0.7rem; font-weight: 600;
+        color: var(--text-dim); letter-spacing: 1.5px; text-transform: uppercase; margin-bottom: 0.6rem;
+    }
+    .dm-col-info { width: 100%; border-collapse: collapse; font-family: 'Fira Code', monospace; font-size: 0.72rem; }
+    .dm-col-info th, .dm-col-info td { padding: 4px 8px; border-bottom: 1px solid var(--border); text-align: left; color: var(--text); }
+    .dm-col-info thead th { color: var(--text-dim); font-weight: 600; }
+    .stDataFrame { border: 1px solid var(--border) !important; border-radius: 8px !important; overflow: hidden; }
+    .stChatInput > div {
+        background: var(--bg-secondary) !important; border-color: var(--border) !important;
+        border-radius: 12px !important; font-family: 'Fira Sans', sans-serif !important;
+    }
+    .stMarkdown, .stMarkdown p, .stText { color: var(--text) !important; }
+    .streamlit-expanderHeader {
+        background: var(--bg-card) !important; border: 1px solid var(--border) !important;
+        border-radius: 8px !important; color: var(--text) !important;
+        font-family: 'Fira Code', monospace !important; font-size: 0.82rem !important;
+    }
+    #MainMenu, footer { visibility: hidden; }
+    header[data-testid="stHeader"] {
+        background: var(--bg-deep) !important;
+        border-bottom: 1px solid var(--border) !important;
+    }
+    .stDeployButton { display: none !important; }
+
+    @media (prefers-reduced-motion: reduce) {
+        .dm-feature-card, .dm-query-pill { transition: none !important; }
+        .dm-feature-card:hover { transform: none !important; }
+    }
+    @media (max-width: 768px) {
+        .dm-features { grid-template-columns: repeat(2,1fr); }
+        .dm-title { font-size: 1.8rem; }
+    }
+"""
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+CSS_BLOCK = f"<style>{_minify_css(_CSS_SOURCE)}</style>"
+
+# ---------------------------------------------------------------------------
+# Static HTML fragments
+# ---------------------------------------------------------------------------
+SIDEBAR_HEADER_HTML = f"""
+<div style="display:flex; align-items:center; gap:10px; margin-bottom:4px;">
+    <span style="color:var(--secondary);">{ICONS['database']}</span>
+    <span style="font-family:'Fira Code',monospace; font-size:1.1rem; font-weight:700; color:#fff;">
+        DataMind<span style="color:var(--success);">AI</span>
+    </span>
+</div>
+"""
+
+HEADER_HTML = """
+<div class="dm-header">
+    <div class="dm-title">DataMind<span class="dm-title-accent">AI</span></div>
+    <div class="dm-subtitle">Natural Language Data Analyst · powered by <code>groq.tool_calling</code></div>
+</div>
+"""
+
+FEATURE_CARDS_HTML = f"""
+<div class="dm-features">
+    <div class="dm-feature-card">
+        <div class="dm-feature-icon blue">{ICONS['search']}</div>
+        <div class="dm-feature-title">Smart Queries</div>
+        <div class="dm-feature-desc">Ask questions in plain English</div>
+    </div>
+    <div class="dm-feature-card">
+        <div class="dm-feature-icon amber">{ICONS['chart']}</div>
+        <div class="dm-feature-title">Auto Charts</div>
+        <div class="dm-feature-desc">Generate visualizations instantly</div>
+    </div>
+    <div class="dm-feature-card">
+        <div class="dm-feature-icon green">{ICONS['calc']}</div>
+        <div class="dm-feature-title">Data Analysis</div>
+        <div class="dm-feature-desc">Stats, grouping, filtering</div>
+    </div>
+    <div class="dm-feature-card">
+        <div class="dm-feature-icon cyan">{ICONS['download']}</div>
+        <div class="dm-feature-title">Export</div>
+        <div class="dm-feature-desc">Save results as CSV files</div>
+    </div>
+</div>
+"""
+
+SAMPLE_QUERIES = [
+    "Show me a summary of the dataset",
+    "What's the average revenue by region?",
+    "Create a bar chart of revenue by product",
+    "Which region has the highest total sales?",
+    "Show the correlation between units and revenue",
+    "Create a pie chart of sales by category",
+    "Export the top 10 revenue entries to CSV",
+]
+
+SAMPLE_QUERIES_HTML = "".join(
+    f'<div class="dm-query-pill">{ICONS["message"]} {q}</div>' for q in SAMPLE_QUERIES
+)
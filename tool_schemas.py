@@ -6,7 +6,9 @@ and what parameters they accept. The model uses these to decide
 which tools to call and with what arguments.
 """
 
-TOOL_SCHEMAS = [
+# A tuple so the shared module-level schemas can't be appended to or reordered;
+# it still serializes as a JSON array for the request body.
+TOOL_SCHEMAS = (
     {
         "type": "function",
         "function": {
@@ -172,4 +174,4 @@ TOOL_SCHEMAS = [
             },
         },
     },
-]
+)
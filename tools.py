@@ -5,15 +5,31 @@ Each tool function returns a JSON string (Groq requirement).
 Tools: load_dataset, run_query, create_chart, export_results
 """
 
+import ast
+import contextlib
+import functools
 import json
 import os
+import re
+import threading
+import types
 from datetime import datetime
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# The sandbox hands tools a shallow copy of the dataset, which is only isolated
+# under copy-on-write. pandas 3 always behaves this way; 2.x needs the opt-in.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # ---------------------------------------------------------------------------
 # Global dataset store
@@ -36,6 +52,15 @@ def clear_dataset(name: str = "default") -> None:
     _datasets.pop(name, None)
 
 
+def call_with_dataset(fn, df: pd.DataFrame | None, kwargs: dict) -> str:
+    """Install `df` as the dataset, then call tool `fn` (worker-process entry point)."""
+    if df is None:
+        clear_dataset()
+    else:
+        set_dataset(df)
+    return fn(**kwargs)
+
+
 # ---------------------------------------------------------------------------
 # Shared sandbox namespace (used by run_query, create_chart, export_results)
 # ---------------------------------------------------------------------------
@@ -43,7 +68,7 @@ def _sandbox(df: pd.DataFrame, **extras) -> tuple[dict, dict]:
     """Return (globals, locals) for sandboxed exec/eval."""
     safe_globals = {"__builtins__": {}}
     safe_locals = {
-        "df": df.copy(),
+        "df": df.copy(deep=False),
         "pd": pd,
         "np": np,
         "len": len, "str": str, "int": int, "float": float,
@@ -62,65 +87,269 @@ def _sandbox(df: pd.DataFrame, **extras) -> tuple[dict, dict]:
     return safe_globals, safe_locals
 
 
+@functools.lru_cache(maxsize=256)
+def _compile(source: str, mode: str):
+    """Compile sandbox code once; the model often resends the same snippet on retries."""
+    return compile(source, "<sandbox>", mode)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_expression(source: str):
+    """Compiled expression, or None if `source` is not one (e.g. plain text). Both outcomes are cached."""
+    try:
+        return _compile(source, "eval")
+    except (SyntaxError, ValueError):
+        return None
+
+
 # ---------------------------------------------------------------------------
 # Tool 1: load_dataset
 # ---------------------------------------------------------------------------
-def load_dataset(filename: str) -> str:
-    """Load a CSV or Excel file into memory and return a summary."""
+SUPPORTED_EXTENSIONS = (".csv", ".tsv", ".xlsx", ".xls", ".xlsb")
+
+
+SAMPLE_ROWS = 50000
+STREAM_SAMPLE_BYTES = 64 << 20  # larger CSV/TSV files are sampled while streaming
+_CSV_DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+
+def _csv_options(filename: str, delimiter: str) -> dict | None:
+    """Arrow CSV reader options for `filename`, or None when pandas has to parse it.
+
+    Peeks at the head of the file first. Blank or duplicated headers (which
+    read_csv renames) send the file to pandas, and time/timestamp columns are
+    read as text, since Arrow would reformat them and read_csv keeps them as is.
+    """
+    parse_options = pacsv.ParseOptions(delimiter=delimiter)
     try:
-        if not os.path.exists(filename):
-            return json.dumps({"error": f"File not found: {filename}"})
+        schema = pacsv.open_csv(
+            filename, read_options=pacsv.ReadOptions(block_size=1 << 20), parse_options=parse_options
+        ).schema
+    except pa.ArrowInvalid:
+        return None  # e.g. an empty file; let read_csv raise its usual error
+    if "" in schema.names or len(set(schema.names)) != len(schema.names):
+        return None
+
+    as_text = {f.name: pa.string() for f in schema if pa.types.is_time(f.type) or pa.types.is_timestamp(f.type)}
+    return {
+        "read_options": pacsv.ReadOptions(use_threads=True, block_size=8 << 20),
+        "parse_options": parse_options,
+        "convert_options": pacsv.ConvertOptions(strings_can_be_null=True, column_types=as_text),
+    }
 
-        ext = os.path.splitext(filename)[1].lower()
-        if ext == ".csv":
-            df = pd.read_csv(filename)
-        elif ext == ".tsv":
-            df = pd.read_csv(filename, sep="\t")
-        elif ext in (".xlsx", ".xls", ".xlsb"):
-            df = pd.read_excel(filename)
-        else:
-            return json.dumps({"error": f"Unsupported file type: {ext}. Supported: CSV, TSV, XLSX, XLS, XLSB."})
 
-        # Intelligent sampling: if rows > 50,000, take a random sample
-        is_sampled = False
-        original_row_count = len(df)
-        if original_row_count > 50000:
-            df = df.sample(n=50000, random_state=42)
-            is_sampled = True
+def _arrow_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert a parsed CSV table to pandas with the dtypes read_csv would give.
 
-        set_dataset(df)
+    Empty/NA cells in text columns are already nulls (strings_can_be_null).
+    ISO dates (the only form Arrow infers them from) are cast back to the same
+    text, as are any times/timestamps the header peek missed, and all-empty
+    columns become float64 like read_csv's all-NaN ones.
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type) or pa.types.is_time(field.type) or pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        elif pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(self_destruct=True)
 
-        summary = {
-            "status": "success",
-            "filename": os.path.basename(filename),
-            "is_sampled": is_sampled,
-            "original_row_count": original_row_count,
-            "shape": {"rows": df.shape[0], "columns": df.shape[1]},
-            "columns": list(df.columns),
-            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-            "null_counts": {col: int(count) for col, count in df.isnull().sum().items() if count > 0},
-            "missing_percentage": {
-                col: round(count / len(df) * 100, 1)
-                for col, count in df.isnull().sum().items()
-                if count > 0
-            },
-            "memory_usage_mb": round(df.memory_usage(deep=True).sum() / (1024 * 1024), 2),
-            "sample_rows": df.head(5).to_dict(orient="records"),
-            "numeric_summary": {},
+
+def read_csv(filename: str, delimiter: str = ",") -> pd.DataFrame:
+    """Parse a delimited file with Arrow's multithreaded CSV reader, or pandas when Arrow can't match it."""
+    options = _csv_options(filename, delimiter)
+    if options is None:
+        return pd.read_csv(filename, sep=delimiter)
+    return _arrow_to_frame(pacsv.read_csv(filename, **options))
+
+
+def _stream_sample_csv(filename: str, options: dict, n: int, seed: int = 42) -> tuple[pd.DataFrame, int]:
+    """Uniformly sample `n` rows from a delimited file, reading it block by block.
+
+    Each row gets a random key and the `n` smallest keys seen so far are kept,
+    so peak memory is one block plus the sample instead of the whole file.
+    Returns (sample, total_row_count).
+    """
+    rng = np.random.default_rng(seed)
+    reader = pacsv.open_csv(filename, **options)
+    kept, keys, total = reader.schema.empty_table(), np.empty(0), 0
+    for batch in reader:
+        total += batch.num_rows
+        kept = pa.concat_tables([kept, pa.Table.from_batches([batch])])
+        keys = np.concatenate([keys, rng.random(batch.num_rows)])
+        if len(keys) > n:
+            idx = np.argpartition(keys, n)[:n]
+            kept, keys = kept.take(idx), keys[idx]
+    return _arrow_to_frame(kept), total
+
+
+def _head_records(df: pd.DataFrame, n: int) -> list[dict]:
+    """First `n` rows as dicts, boxed through one object-array conversion.
+
+    Missing values come out as None (JSON null) rather than NaN.
+    """
+    head = df.head(n)
+    columns = list(head.columns)
+    return [dict(zip(columns, row)) for row in head.to_numpy(dtype=object, na_value=None).tolist()]
+
+
+SIDECAR_SUFFIX = ".parquet"
+SIDECAR_SOURCE_KEY = b"dm_source_stat"  # Parquet metadata key: "<mtime_ns>:<size>" of the parsed source
+
+
+def _source_stamp(mtime_ns: int, size: int) -> bytes:
+    return f"{mtime_ns}:{size}".encode()
+
+
+def _read_sidecar(sidecar: str, stamp: bytes) -> pd.DataFrame | None:
+    """Load a Parquet sidecar if it was written from exactly this version of the source."""
+    try:
+        parquet = pq.ParquetFile(sidecar)
+        if (parquet.schema_arrow.metadata or {}).get(SIDECAR_SOURCE_KEY) != stamp:
+            return None
+        return parquet.read().to_pandas()
+    except Exception:
+        return None  # missing or unreadable sidecar
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar: str, stamp: bytes) -> None:
+    """Write `df` as a Parquet sidecar tagged with `stamp`; best effort, runs in a background thread."""
+    tmp = f"{sidecar}.{threading.get_ident()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**table.schema.metadata, SIDECAR_SOURCE_KEY: stamp})
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, sidecar)
+    except Exception:
+        # Unwritable directory, or columns Parquet can't represent — just parse next time
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _parse_file(filename: str, ext: str, mtime_ns: int, size: int) -> tuple[pd.DataFrame, int]:
+    """Parse a dataset, preferring a Parquet sidecar written from this exact source.
+
+    `mtime_ns` and `size` are the source's stat from before parsing; the sidecar
+    is tagged with them and only reused when both match, so a replaced source
+    (even one with an older mtime) or one rewritten mid-parse is parsed again.
+
+    Returns (frame, total_row_count). Large CSV/TSV files without a sidecar come
+    back already sampled down to SAMPLE_ROWS rows.
+    """
+    sidecar = filename + SIDECAR_SUFFIX
+    stamp = _source_stamp(mtime_ns, size)
+    df = _read_sidecar(sidecar, stamp)
+    if df is not None:
+        return df, len(df)
+
+    if ext in _CSV_DELIMITERS and size > STREAM_SAMPLE_BYTES:
+        options = _csv_options(filename, _CSV_DELIMITERS[ext])
+        if options is not None:
+            try:
+                return _stream_sample_csv(filename, options, SAMPLE_ROWS)
+            except pa.ArrowInvalid:
+                pass  # a later block didn't fit the types inferred from the first; parse it whole
+
+    if ext in _CSV_DELIMITERS:
+        df = read_csv(filename, _CSV_DELIMITERS[ext])
+    else:
+        df = pd.read_excel(filename)
+
+    # Not a daemon: interpreter exit waits for the write instead of leaving a partial temp file
+    threading.Thread(target=_write_sidecar, args=(df, sidecar, stamp)).start()
+    return df, len(df)
+
+
+OBJECT_BYTES_PER_ROW = 64  # rough heap size of a short Python str
+
+
+def _estimate_memory_bytes(df: pd.DataFrame) -> int:
+    """Approximate df.memory_usage(deep=True) without walking object columns.
+
+    Arrow-backed columns already report their buffer sizes; object columns are
+    charged a flat OBJECT_BYTES_PER_ROW instead of measuring every element.
+    """
+    n_object = int((df.dtypes == object).sum())
+    return int(df.memory_usage(deep=False).sum()) + n_object * OBJECT_BYTES_PER_ROW * len(df)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_file(filename: str, mtime_ns: int, size: int) -> tuple[pd.DataFrame, str]:
+    """Parse a dataset file and build its JSON summary.
+
+    Cached on (path, mtime, size), so repeated loads of an unchanged file skip
+    the parse; editing the file changes the key and invalidates the entry.
+    """
+    df, original_row_count = _parse_file(filename, os.path.splitext(filename)[1].lower(), mtime_ns, size)
+
+    # Intelligent sampling: if rows > SAMPLE_ROWS, take a random sample
+    if len(df) > SAMPLE_ROWS:
+        df = df.sample(n=SAMPLE_ROWS, random_state=42)
+    is_sampled = len(df) < original_row_count
+
+    # One null scan shared by null_counts and missing_percentage
+    nulls = df.isnull().sum()
+    nulls = nulls[nulls > 0]
+
+    summary = {
+        "status": "success",
+        "filename": os.path.basename(filename),
+        "is_sampled": is_sampled,
+        "original_row_count": original_row_count,
+        "shape": {"rows": df.shape[0], "columns": df.shape[1]},
+        "columns": list(df.columns),
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "null_counts": {col: int(count) for col, count in nulls.items()},
+        "missing_percentage": {col: round(count / len(df) * 100, 1) for col, count in nulls.items()},
+        "memory_usage_mb": round(_estimate_memory_bytes(df) / (1024 * 1024), 2),
+        "sample_rows": _head_records(df, 5),
+        "numeric_summary": {},
+    }
+
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if numeric_cols:
+        stats = df[numeric_cols].describe()
+        # Round the whole stats block at once, then unbox each column in one tolist()
+        rounded = np.round(stats.to_numpy(dtype=np.float64), 2)
+        stat_names = stats.index.tolist()
+        summary["numeric_summary"] = {
+            col: dict(zip(stat_names, rounded[:, i].tolist()))
+            for i, col in enumerate(stats.columns)
         }
 
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        if numeric_cols:
-            stats = df[numeric_cols].describe().to_dict()
-            summary["numeric_summary"] = {
-                col: {k: round(float(v), 2) for k, v in col_stats.items()}
-                for col, col_stats in stats.items()
-            }
+    return df, json.dumps(summary, default=str)
+
+
+def prepare_dataset(filename: str) -> tuple[pd.DataFrame | None, str]:
+    """Parse a dataset and build its summary without making it the loaded one.
+
+    Returns (frame, summary JSON); the frame is None when loading failed.
+    """
+    try:
+        if not os.path.exists(filename):
+            return None, json.dumps({"error": f"File not found: {filename}"})
+
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in SUPPORTED_EXTENSIONS:
+            return None, json.dumps({"error": f"Unsupported file type: {ext}. Supported: CSV, TSV, XLSX, XLS, XLSB."})
 
-        return json.dumps(summary, default=str)
+        stat = os.stat(filename)
+        return _load_file(os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
 
     except Exception as e:
-        return json.dumps({"error": f"Failed to load dataset: {str(e)}"})
+        return None, json.dumps({"error": f"Failed to load dataset: {str(e)}"})
+
+
+def install_dataset(df: pd.DataFrame | None, summary: str) -> str:
+    """Make a prepared frame the loaded dataset and return its summary."""
+    if df is not None:
+        # clean_data can modify the stored frame in place, so keep the cached one pristine
+        set_dataset(df.copy())
+    return summary
+
+
+def load_dataset(filename: str) -> str:
+    """Load a CSV or Excel file into memory and return a summary."""
+    return install_dataset(*prepare_dataset(filename))
 
 
 # ---------------------------------------------------------------------------
@@ -134,7 +363,7 @@ def run_query(code: str) -> str:
             return json.dumps({"error": "No dataset loaded. Use load_dataset first."})
 
         g, l = _sandbox(df)
-        exec(code, g, l)
+        exec(_compile(code, "exec"), g, l)
 
         if "result" not in l:
             return json.dumps({
@@ -144,7 +373,14 @@ def run_query(code: str) -> str:
 
         result = l["result"]
         if isinstance(result, (pd.DataFrame, pd.Series)):
-            text = result.head(50).to_string() if len(result) > 50 else result.to_string()
+            # TSV skips to_string's column-width alignment pass; a default RangeIndex carries no information,
+            # nor does an unnamed Series' "0" header. 12 significant digits hide float noise like 0.07500000000000001.
+            text = result.head(50).to_csv(
+                sep="\t",
+                index=not isinstance(result.index, pd.RangeIndex),
+                header=getattr(result, "name", "") is not None,
+                float_format="%.12g",
+            )
             out = {"status": "success", "result": text}
             if isinstance(result, pd.DataFrame) and len(result) > 50:
                 out["note"] = f"Showing first 50 of {len(result)} rows"
@@ -160,6 +396,144 @@ def run_query(code: str) -> str:
 # Tool 3: create_chart
 # ---------------------------------------------------------------------------
 CHARTS_DIR = "charts"
+# Anything but letters, digits, space, "_" and "-" is dropped from chart filenames
+_UNSAFE_TITLE_CHARS = re.compile(r"[^\w -]")
+CHART_DPI = 100  # 10x6in figure -> 1000x600px, about the width Streamlit displays it at
+CHART_STYLE = "dark_background"
+_PLOT_LOCK = threading.Lock()
+_figure = None
+_thread_figures = threading.local()
+_render_gate = threading.Condition()
+_shared_renders = 0  # per-thread figure renders in flight
+_pyplot_render = False
+
+# Baseline for per-thread renders; pyplot renders re-apply it and undo their changes
+plt.style.use(CHART_STYLE)
+CHART_PALETTES = {
+    "vibrant": ['#00d4ff', '#ff6b6b', '#00ff88', '#ffd700', '#ff69b4'],
+    "corporate": ['#1e3a8a', '#3b82f6', '#94a3b8', '#1d4ed8', '#0f172a'],
+    "pastel": ['#80d0ff', '#ffafaf', '#9bffc2', '#fff0a3', '#ffc2eb'],
+    "sunset": ['#ff4e50', '#fc913a', '#f9d423', '#ede574', '#e1f5c4'],
+}
+
+
+@contextlib.contextmanager
+def _shared_render():
+    """Held by per-thread figure renders: any number at once, never during a pyplot render."""
+    global _shared_renders
+    with _render_gate:
+        _render_gate.wait_for(lambda: not _pyplot_render)
+        _shared_renders += 1
+    try:
+        yield
+    finally:
+        with _render_gate:
+            _shared_renders -= 1
+            _render_gate.notify_all()
+
+
+@contextlib.contextmanager
+def _pyplot_style():
+    """Held by pyplot renders: one at a time, alone, with the chart style freshly applied.
+
+    Chart code here can change the global style/rcParams every render reads, so
+    per-thread renders are kept out and the changes are rolled back on exit.
+    """
+    global _pyplot_render
+    with _PLOT_LOCK:
+        with _render_gate:
+            _pyplot_render = True  # set before waiting, so new shared renders queue behind us
+            _render_gate.wait_for(lambda: _shared_renders == 0)
+        try:
+            with plt.style.context(CHART_STYLE, after_reset=True):
+                yield
+        finally:
+            with _render_gate:
+                _pyplot_render = False
+                _render_gate.notify_all()
+
+
+def _chart_axes():
+    """Return (fig, ax) on the reusable pyplot figure, cleared and made current.
+
+    Building a Figure and canvas per chart dominates small renders, so one
+    figure is kept and reset instead. It is recreated if sandbox code closed it.
+    """
+    global _figure
+    if _figure is None or not plt.fignum_exists(_figure.number):
+        _figure = plt.figure(figsize=(10, 6))
+    else:
+        _figure.clf()
+        _figure.set_size_inches(10, 6)
+        plt.figure(_figure.number)
+    return _figure, _figure.add_subplot()
+
+
+def _thread_axes():
+    """Return (fig, ax) on this thread's own pyplot-free figure, cleared."""
+    fig = getattr(_thread_figures, "figure", None)
+    if fig is None:
+        fig = _thread_figures.figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(fig)
+    else:
+        fig.clf()
+        fig.set_size_inches(10, 6)
+    return fig, fig.add_subplot()
+
+
+# pandas plotting methods that draw on pyplot's current figure unless given ax=
+_PANDAS_PLOT_METHODS = frozenset({"plot", "hist", "boxplot"})
+
+
+@functools.lru_cache(maxsize=256)
+def _uses_pyplot(source: str) -> bool:
+    """Whether chart code touches pyplot's global state.
+
+    That is any use of `plt` or `pd.plotting`, and pandas plot calls such as
+    df.plot(...), df.plot.bar(...) or s.hist(...) made without ax=. Calls on
+    `ax`/`fig` themselves (ax.plot, ax.hist) are plain Axes methods.
+    """
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Name) and node.id == "plt":
+            return True
+        if isinstance(node, ast.Attribute) and node.attr == "plotting":
+            return True
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and not any(kw.arg == "ax" for kw in node.keywords)
+        ):
+            target = node.func.value
+            if node.func.attr in _PANDAS_PLOT_METHODS and not (isinstance(target, ast.Name) and target.id in ("ax", "fig")):
+                return True
+            if isinstance(target, ast.Attribute) and target.attr == "plot":  # df.plot.bar(...)
+                return True
+    return False
+
+
+def _close_stray_figures() -> None:
+    """Close pyplot figures other than the shared one, e.g. from plotting code the check above missed."""
+    for num in plt.get_fignums():
+        if _figure is None or num != _figure.number:
+            plt.close(num)
+
+
+def _draw_chart(fig, ax, code: types.CodeType, df: pd.DataFrame, colors: list, title: str, **extras) -> str:
+    """Run chart code against (fig, ax), apply the theme and save it; returns the file path."""
+    g, l = _sandbox(df, fig=fig, ax=ax, colors=colors, **extras)
+    exec(code, g, l)
+
+    ax.set_title(title, fontsize=14, fontweight="bold", color="white", pad=15)
+    fig.patch.set_facecolor("#0e1117")
+    ax.set_facecolor("#0e1117")
+    fig.tight_layout()
+
+    safe_title = _UNSAFE_TITLE_CHARS.sub("", title)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(CHARTS_DIR, f"{timestamp}_{safe_title.replace(' ', '_').lower()}.png")
+    # tight_layout above already fits labels, so skip bbox_inches="tight" and its extra draw
+    fig.savefig(filepath, dpi=CHART_DPI, facecolor="#0e1117")
+    return filepath
 
 
 def create_chart(code: str, title: str = "Chart", palette: str = "vibrant") -> str:
@@ -170,31 +544,26 @@ def create_chart(code: str, title: str = "Chart", palette: str = "vibrant") -> s
             return json.dumps({"error": "No dataset loaded. Use load_dataset first."})
 
         os.makedirs(CHARTS_DIR, exist_ok=True)
+        colors = CHART_PALETTES.get(palette, CHART_PALETTES["vibrant"])
+        compiled = _compile(code, "exec")
 
-        palettes = {
-            "vibrant": ['#00d4ff', '#ff6b6b', '#00ff88', '#ffd700', '#ff69b4'],
-            "corporate": ['#1e3a8a', '#3b82f6', '#94a3b8', '#1d4ed8', '#0f172a'],
-            "pastel": ['#80d0ff', '#ffafaf', '#9bffc2', '#fff0a3', '#ffc2eb'],
-            "sunset": ['#ff4e50', '#fc913a', '#f9d423', '#ede574', '#e1f5c4'],
-        }
-        colors = palettes.get(palette, palettes["vibrant"])
-
-        plt.style.use("dark_background")
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        g, l = _sandbox(df, plt=plt, fig=fig, ax=ax, colors=colors)
-        exec(code, g, l)
-
-        ax.set_title(title, fontsize=14, fontweight="bold", color="white", pad=15)
-        fig.patch.set_facecolor("#0e1117")
-        ax.set_facecolor("#0e1117")
-        plt.tight_layout()
-
-        safe_title = "".join(c if c.isalnum() or c in " _-" else "" for c in title)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = os.path.join(CHARTS_DIR, f"{timestamp}_{safe_title.replace(' ', '_').lower()}.png")
-        fig.savefig(filepath, dpi=150, bbox_inches="tight", facecolor="#0e1117")
-        plt.close(fig)
+        if _uses_pyplot(code):
+            # pyplot keeps global state, so code that uses it renders one chart at a time
+            with _pyplot_style():
+                try:
+                    filepath = _draw_chart(*_chart_axes(), compiled, df, colors, title, plt=plt)
+                except Exception:
+                    plt.close("all")
+                    raise
+                finally:
+                    _close_stray_figures()
+        else:
+            # ax/fig-only code draws on a per-thread figure, so concurrent calls render in parallel
+            with _shared_render():
+                try:
+                    filepath = _draw_chart(*_thread_axes(), compiled, df, colors, title)
+                finally:
+                    _close_stray_figures()
 
         return json.dumps({
             "status": "success",
@@ -204,7 +573,6 @@ def create_chart(code: str, title: str = "Chart", palette: str = "vibrant") -> s
         })
 
     except Exception as e:
-        plt.close("all")
         return json.dumps({"error": f"Chart creation failed: {str(e)}"})
 
 
@@ -214,6 +582,29 @@ def create_chart(code: str, title: str = "Chart", palette: str = "vibrant") -> s
 EXPORTS_DIR = "exports"
 
 
+def _write_frame_csv(df: pd.DataFrame, filepath: str) -> None:
+    """Write `df` (without its index) as CSV, using Arrow's C++ writer when it can.
+
+    Only frames of integers and strings take the Arrow path. Its output differs
+    from to_csv's in that the header and every string field are quoted, which
+    CSV readers undo. Floats stay on to_csv: Arrow writes whole values without
+    the ".0" (100.0 as 100), so read_csv would bring the column back as int64.
+    Booleans and datetimes render differently too.
+    """
+    if all(pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_string_dtype(dtype) for dtype in df.dtypes):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError):
+            table = None  # e.g. object columns holding mixed Python types
+        # object columns can still turn out to hold floats, bools, ...
+        if table is not None and all(
+            pa.types.is_integer(t) or pa.types.is_string(t) or pa.types.is_large_string(t) for t in table.schema.types
+        ):
+            pacsv.write_csv(table, filepath)
+            return
+    df.to_csv(filepath, index=False)
+
+
 def export_results(data: str, filename: str = "export.csv") -> str:
     """Save query results to a CSV file."""
     try:
@@ -224,19 +615,22 @@ def export_results(data: str, filename: str = "export.csv") -> str:
         os.makedirs(EXPORTS_DIR, exist_ok=True)
         filepath = os.path.join(EXPORTS_DIR, filename)
 
-        g, l = _sandbox(df)
-        try:
-            result = eval(data, g, l)
-            if isinstance(result, pd.DataFrame):
-                result.to_csv(filepath, index=False)
-            elif isinstance(result, pd.Series):
-                result.to_csv(filepath)
-            else:
-                with open(filepath, "w") as f:
-                    f.write(str(result))
-        except (SyntaxError, NameError, TypeError, ValueError):
+        # Plain-text payloads are written as-is; only real expressions are evaluated
+        result = data
+        code = _compile_expression(data)
+        if code is not None:
+            try:
+                result = eval(code, *_sandbox(df))
+            except (NameError, TypeError, ValueError):
+                pass
+
+        if isinstance(result, pd.DataFrame):
+            _write_frame_csv(result, filepath)
+        elif isinstance(result, pd.Series):
+            result.to_csv(filepath)
+        else:
             with open(filepath, "w") as f:
-                f.write(data)
+                f.write(str(result))
 
         return json.dumps({
             "status": "success",
@@ -265,15 +659,14 @@ def clean_data(operation: str, columns: list = None, value: str = None) -> str:
             df = df.dropna(subset=columns) if columns else df.dropna()
         elif operation == "fill_na":
             if columns:
-                for col in columns:
-                    if col in df.columns:
-                        # Attempt numeric conversion for mean/median fill
-                        if value == "mean":
-                            df[col] = df[col].fillna(df[col].mean())
-                        elif value == "median":
-                            df[col] = df[col].fillna(df[col].median())
-                        else:
-                            df[col] = df[col].fillna(value)
+                cols = [col for col in dict.fromkeys(columns) if col in df.columns]
+                if cols:
+                    if value in ("mean", "median"):
+                        # One aggregation pass over all numeric columns; non-numeric ones are left as-is
+                        fill = getattr(df[cols], value)(numeric_only=True)
+                    else:
+                        fill = value
+                    df[cols] = df[cols].fillna(fill)
             else:
                 df = df.fillna(value)
         elif operation == "drop_cols":